@@ -5,12 +5,12 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
 from typing import Union
-from pydantic import BaseModel
+import msgspec
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,34 +22,65 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(
+        database_url,
+        # Each worker process gets its own pool; size it to the host rather than the driver default of 100
+        maxPoolSize=min(50, 2 * (os.cpu_count() or 1) + 1),
+        minPoolSize=2,
+        # Compressors are negotiated with the server; zlib is the stdlib fallback
+        compressors="zstd,zlib",
+        retryWrites=True,
+        w="majority",
+    )
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
-    if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+def _collection(collection: Union[str, AsyncIOMotorCollection]) -> AsyncIOMotorCollection:
+    """Accept a collection name or an already bound collection handle"""
+    return db[collection] if isinstance(collection, str) else collection
 
-    # Convert Pydantic model to dict if needed
-    if isinstance(data, BaseModel):
-        data_dict = data.model_dump()
+def _to_document(data: Union[msgspec.Struct, dict], now: datetime) -> dict:
+    """Plain dict for insertion, stamped with created_at/updated_at"""
+    # Convert msgspec Struct to dict if needed (shallow; fields are primitives/lists)
+    if isinstance(data, msgspec.Struct):
+        data_dict = msgspec.structs.asdict(data)
     else:
         data_dict = data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+    data_dict['created_at'] = now
+    data_dict['updated_at'] = now
+    return data_dict
+
+async def create_document(collection: Union[str, AsyncIOMotorCollection], data: Union[msgspec.Struct, dict]):
+    """Insert a single document with timestamp"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await _collection(collection).insert_one(_to_document(data, datetime.now(timezone.utc)))
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection: Union[str, AsyncIOMotorCollection], items: list):
+    """Insert many documents with timestamps in a single round-trip"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    result = await _collection(collection).insert_many([_to_document(item, now) for item in items], ordered=False)
+    return [str(_id) for _id in result.inserted_ids]
+
+def find_documents(collection: Union[str, AsyncIOMotorCollection], filter_dict: dict = None, limit: int = None, sort: list = None, projection: dict = None):
+    """Get an async cursor over documents from collection, sorted and projected server-side"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    cursor = _collection(collection).find(filter_dict or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+    return cursor
+
+async def get_documents(collection: Union[str, AsyncIOMotorCollection], filter_dict: dict = None, limit: int = None, sort: list = None, projection: dict = None):
+    """Get documents from collection, optionally sorted and projected server-side"""
+    cursor = find_documents(collection, filter_dict, limit, sort=sort, projection=projection)
+    return await cursor.to_list(length=limit or None)
@@ -1,178 +1,381 @@
+import asyncio
+import functools
+import logging
 import os
-from datetime import datetime
-from typing import Optional
-
-from fastapi import FastAPI, HTTPException
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Optional
+
+import msgspec
+import orjson
+from bson import ObjectId
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
 
-from database import db, create_document, get_documents
+from database import db, create_document, create_documents, find_documents
 from schemas import Blogpost, Tip, Challenge, Ebooktest
 
-app = FastAPI(title="Digitális Szombat API", version="1.0.0")
+
+logger = logging.getLogger("uvicorn.error")
+
+
+# --------- JSON encoding ---------
+
+def _default(o):
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError
+
+
+def _encode(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NAIVE_UTC)
+
+
+class MongoJSONResponse(JSONResponse):
+    """Encodes raw Mongo documents with orjson (ObjectId -> str, naive datetimes as UTC)"""
+
+    def render(self, content: Any) -> bytes:
+        return _encode(content)
+
+
+app = FastAPI(title="Digitális Szombat API", version="1.0.0", default_response_class=MongoJSONResponse)
+
+# Comma-separated list of frontend origins; unset keeps CORS open. Credentials
+# are only allowed with an explicit list, since browsers reject them with "*".
+ALLOWED_ORIGINS = frozenset(o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip())
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=sorted(ALLOWED_ORIGINS) or ["*"],
+    allow_credentials=bool(ALLOWED_ORIGINS),
+    allow_methods=["GET", "POST"],
+    allow_headers=["authorization", "content-type"],
 )
 
 
 # --------- Helpers ---------
 
-def _serialize(doc: dict):
-    if not doc:
-        return doc
-    d = dict(doc)
-    _id = d.pop("_id", None)
-    if _id is not None:
-        d["id"] = str(_id)
-    # Convert datetimes to isoformat
-    for k, v in list(d.items()):
-        if isinstance(v, datetime):
-            d[k] = v.isoformat()
-    return d
+def _with_id(doc: dict) -> dict:
+    # Rename Mongo's _id in place; the encoder stringifies the ObjectId
+    doc["id"] = doc.pop("_id")
+    return doc
+
+
+async def _json_array(first: dict, docs) -> AsyncIterator[bytes]:
+    """Frame documents from an async cursor as a JSON array, one chunk per document"""
+    yield b"[" + _encode(_with_id(first))
+    async for doc in docs:
+        yield b"," + _encode(_with_id(doc))
+    yield b"]"
+
+
+async def _collect_chunks(chunks: AsyncIterator[bytes], on_complete: Callable[[bytes], None]) -> AsyncIterator[bytes]:
+    # Pass chunks through and hand the full body over once the stream completes.
+    # This buffers the whole body, so memory for these responses is O(limit).
+    parts = []
+    async for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    on_complete(b"".join(parts))
+
+
+async def _list_response(docs, on_complete: Callable[[bytes], None] = None) -> Response:
+    """Stream documents straight from the cursor to JSON, without a model round-trip"""
+    # Fetch the first batch before the 200 goes out, so query failures
+    # (server selection, OperationFailure, network) still surface as errors
+    try:
+        first = await anext(docs)
+    except StopAsyncIteration:
+        if on_complete is not None:
+            on_complete(b"[]")
+        return Response(b"[]", media_type="application/json")
+
+    chunks = _json_array(first, docs)
+    if on_complete is not None:
+        chunks = _collect_chunks(chunks, on_complete)
+    return StreamingResponse(chunks, media_type="application/json")
 
 
 def collection_name(model_cls) -> str:
     return model_cls.__name__.lower()
 
 
+# Collection names and handles are fixed per process; resolve them once
+BLOGPOSTS = collection_name(Blogpost)
+TIPS = collection_name(Tip)
+CHALLENGES = collection_name(Challenge)
+EBOOKTESTS = collection_name(Ebooktest)
+
+if db is not None:
+    _blogposts, _tips, _challenges, _ebooktests = db[BLOGPOSTS], db[TIPS], db[CHALLENGES], db[EBOOKTESTS]
+else:
+    _blogposts = _tips = _challenges = _ebooktests = None
+
+
+# Newest published first; posts without published_at (null sorts lowest)
+# come after all published ones, ordered among themselves by created_at
+BLOGPOST_SORT = [("published_at", DESCENDING), ("created_at", DESCENDING)]
+
+# List cards never render the body; only GET /api/blogposts/{slug} returns it
+BLOGPOST_LIST_PROJECTION = {"content": 0}
+
+# Rendered JSON bodies for blogpost reads, keyed by slug and by (tag, limit).
+# Per process and short-lived; create_blogpost and seed_demo invalidate them.
+_blogpost_cache = TTLCache(maxsize=1024, ttl=60)
+_blogpost_list_cache = TTLCache(maxsize=256, ttl=60)
+# Bumped on every list invalidation; a listing only caches its body if no
+# invalidation happened since it started reading
+_blogpost_list_generation = 0
+
+
+def _invalidate_blogpost_lists():
+    global _blogpost_list_generation
+    _blogpost_list_generation += 1
+    _blogpost_list_cache.clear()
+
+
+def _cache_blogpost_list(key, generation: int, body: bytes):
+    if generation == _blogpost_list_generation:
+        _blogpost_list_cache[key] = body
+
+
+# --------- Startup ---------
+
+@app.on_event("startup")
+async def ensure_indexes():
+    """Create the indexes backing the list endpoints (idempotent)"""
+    if db is None:
+        return
+    await _blogposts.create_index([("tags", ASCENDING), ("published_at", DESCENDING), ("created_at", DESCENDING)])
+    # Same keys as BLOGPOST_SORT, so untagged listings are an index walk stopping at limit
+    await _blogposts.create_index([("published_at", DESCENDING), ("created_at", DESCENDING)])
+    # Multikey indexes for the single-tag filter on the other listings
+    for collection in (_tips, _challenges, _ebooktests):
+        await collection.create_index("tags")
+
+    # Last and non-fatal: data written before the index existed may hold duplicate slugs
+    try:
+        await _blogposts.create_index("slug", unique=True)
+    except OperationFailure:
+        duplicates = await _blogposts.aggregate([
+            {"$group": {"_id": "$slug", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ]).to_list(length=None)
+        logger.error(
+            "Unique slug index not created; fix these duplicate blogpost slugs and restart: %s",
+            ", ".join(sorted(str(d["_id"]) for d in duplicates)),
+        )
+
+
 # --------- Root & Health ---------
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Digitális Szombat backend fut"}
 
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe; never touches the database"""
+    return {"ok": True}
+
+
+# Last successful /test response and when it was built (time.monotonic())
+HEALTH_TTL = 10.0
+_cached_health: Optional[tuple[float, dict]] = None
+
+# Static part of the /test response; the environment is fixed for the process lifetime
+_HEALTH_TEMPLATE = {
+    "backend": "✅ Running",
+    "database": "❌ Not Available",
+    "database_url": "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set",
+    "database_name": "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set",
+    "connection_status": "Not Connected",
+    "collections": [],
+}
+
+
 @app.get("/test")
-def test_database():
-    response = {
-        "backend": "✅ Running",
-        "database": "❌ Not Available",
-        "database_url": "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set",
-        "database_name": "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set",
-        "connection_status": "Not Connected",
-        "collections": [],
-    }
+async def test_database():
+    global _cached_health
+    if _cached_health is not None and time.monotonic() - _cached_health[0] < HEALTH_TTL:
+        return _cached_health[1]
+
+    response = _HEALTH_TEMPLATE.copy()
     try:
         if db is not None:
             response["database"] = "✅ Connected & Working"
             response["connection_status"] = "Connected"
-            response["collections"] = db.list_collection_names()
+            response["collections"] = await db.list_collection_names()
+            _cached_health = (time.monotonic(), response)
     except Exception as e:
         response["database"] = f"⚠️ {str(e)[:80]}"
     return response
 
 
-# --------- Request models for POST (reuse schemas) ---------
+# --------- Request bodies for POST ---------
 
-class CreateBlogpost(Blogpost):
-    pass
+# One decoder per request schema, built once and reused across requests.
+# strict=False keeps Pydantic's lax coercions, e.g. "7" for an int or a unix timestamp for a datetime.
+_DECODERS = {model_cls: msgspec.json.Decoder(model_cls, strict=False) for model_cls in (Blogpost, Tip, Challenge, Ebooktest)}
 
 
-class CreateTip(Tip):
-    pass
+def _body_schema(model_cls: type[msgspec.Struct]) -> dict:
+    """OpenAPI requestBody for handlers that parse the raw body themselves"""
+    (_, components) = msgspec.json.schema_components([model_cls])
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": components[model_cls.__name__]}},
+        }
+    }
 
 
-class CreateChallenge(Challenge):
-    pass
+# msgspec reports where validation failed as a suffix like " - at `$.tags[1]`"
+_ERROR_PATH = re.compile(r" - at `\$(.*)`$")
+_PATH_PART = re.compile(r"\.([^.\[]+)|\[(\d+)\]")
+_MISSING_FIELD = re.compile(r"^Object missing required field `([^`]+)`")
 
 
-class CreateEbooktest(Ebooktest):
-    pass
+def _validation_error(e: msgspec.ValidationError) -> dict:
+    """FastAPI-style error entry, with the msgspec path turned into loc"""
+    message = str(e)
+    loc = ["body"]
+    path = _ERROR_PATH.search(message)
+    if path:
+        message = message[:path.start()]
+        loc.extend(int(index) if index else name for name, index in _PATH_PART.findall(path.group(1)))
+    missing = _MISSING_FIELD.match(message)
+    if missing:
+        loc.append(missing.group(1))
+    return {"loc": tuple(loc), "msg": message, "type": "missing" if missing else "value_error"}
+
+
+async def _parse_body(request: Request, model_cls: type[msgspec.Struct]) -> msgspec.Struct:
+    # Decode and validate the JSON bytes in one pass
+    try:
+        return _DECODERS[model_cls].decode(await request.body())
+    except msgspec.ValidationError as e:
+        raise RequestValidationError([_validation_error(e)])
+    except msgspec.DecodeError as e:
+        raise RequestValidationError([{"loc": ("body",), "msg": "JSON decode error", "type": "json_invalid", "ctx": {"error": str(e)}}])
 
 
 # --------- Blogposts ---------
 
 @app.get("/api/blogposts")
-def list_blogposts(limit: Optional[int] = 20, tag: Optional[str] = None):
+async def list_blogposts(limit: Optional[int] = 20, tag: Optional[str] = None):
+    body = _blogpost_list_cache.get((tag, limit))
+    if body is not None:
+        return Response(body, media_type="application/json")
+    generation = _blogpost_list_generation
     filt = {}
     if tag:
-        filt["tags"] = {"$in": [tag]}
-    docs = get_documents(collection_name(Blogpost), filt, limit)
-    # sort by published_at desc if present
-    docs = sorted(docs, key=lambda d: d.get("published_at") or d.get("created_at"), reverse=True)
-    return [_serialize(d) for d in docs]
+        filt["tags"] = tag
+    docs = find_documents(_blogposts, filt, limit, sort=BLOGPOST_SORT, projection=BLOGPOST_LIST_PROJECTION)
+    return await _list_response(docs, functools.partial(_cache_blogpost_list, (tag, limit), generation))
 
 
 @app.get("/api/blogposts/{slug}")
-def get_blogpost(slug: str):
-    doc = db[collection_name(Blogpost)].find_one({"slug": slug})
-    if not doc:
-        raise HTTPException(status_code=404, detail="Not found")
-    return _serialize(doc)
-
-
-@app.post("/api/blogposts", status_code=201)
-def create_blogpost(payload: CreateBlogpost):
-    # ensure slug unique
-    if db[collection_name(Blogpost)].find_one({"slug": payload.slug}):
+async def get_blogpost(slug: str):
+    body = _blogpost_cache.get(slug)
+    if body is None:
+        doc = await _blogposts.find_one({"slug": slug})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Not found")
+        body = _blogpost_cache[slug] = _encode(_with_id(doc))
+    return Response(body, media_type="application/json")
+
+
+@app.post("/api/blogposts", status_code=201, openapi_extra=_body_schema(Blogpost))
+async def create_blogpost(request: Request):
+    payload = await _parse_body(request, Blogpost)
+    # slug uniqueness is enforced by the unique index
+    try:
+        _id = await create_document(_blogposts, payload)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Slug already exists")
-    _id = create_document(collection_name(Blogpost), payload)
+    _blogpost_cache.pop(payload.slug, None)
+    _invalidate_blogpost_lists()
     return {"id": _id}
 
 
 # --------- Tips ---------
 
 @app.get("/api/tips")
-def list_tips(limit: Optional[int] = 50, tag: Optional[str] = None):
+async def list_tips(limit: Optional[int] = 50, tag: Optional[str] = None):
     filt = {}
     if tag:
-        filt["tags"] = {"$in": [tag]}
-    docs = get_documents(collection_name(Tip), filt, limit)
-    return [_serialize(d) for d in docs]
+        filt["tags"] = tag
+    docs = find_documents(_tips, filt, limit)
+    return await _list_response(docs)
 
 
-@app.post("/api/tips", status_code=201)
-def create_tip(payload: CreateTip):
-    _id = create_document(collection_name(Tip), payload)
+@app.post("/api/tips", status_code=201, openapi_extra=_body_schema(Tip))
+async def create_tip(request: Request):
+    payload = await _parse_body(request, Tip)
+    _id = await create_document(_tips, payload)
     return {"id": _id}
 
 
 # --------- Challenges ---------
 
 @app.get("/api/challenges")
-def list_challenges(limit: Optional[int] = 50, tag: Optional[str] = None):
+async def list_challenges(limit: Optional[int] = 50, tag: Optional[str] = None):
     filt = {}
     if tag:
-        filt["tags"] = {"$in": [tag]}
-    docs = get_documents(collection_name(Challenge), filt, limit)
-    return [_serialize(d) for d in docs]
+        filt["tags"] = tag
+    docs = find_documents(_challenges, filt, limit)
+    return await _list_response(docs)
 
 
-@app.post("/api/challenges", status_code=201)
-def create_challenge(payload: CreateChallenge):
-    _id = create_document(collection_name(Challenge), payload)
+@app.post("/api/challenges", status_code=201, openapi_extra=_body_schema(Challenge))
+async def create_challenge(request: Request):
+    payload = await _parse_body(request, Challenge)
+    _id = await create_document(_challenges, payload)
     return {"id": _id}
 
 
 # --------- Ebook tests ---------
 
 @app.get("/api/ebooktests")
-def list_ebooktests(limit: Optional[int] = 50, tag: Optional[str] = None):
+async def list_ebooktests(limit: Optional[int] = 50, tag: Optional[str] = None):
     filt = {}
     if tag:
-        filt["tags"] = {"$in": [tag]}
-    docs = get_documents(collection_name(Ebooktest), filt, limit)
-    return [_serialize(d) for d in docs]
+        filt["tags"] = tag
+    docs = find_documents(_ebooktests, filt, limit)
+    return await _list_response(docs)
 
 
-@app.post("/api/ebooktests", status_code=201)
-def create_ebooktest(payload: CreateEbooktest):
-    _id = create_document(collection_name(Ebooktest), payload)
+@app.post("/api/ebooktests", status_code=201, openapi_extra=_body_schema(Ebooktest))
+async def create_ebooktest(request: Request):
+    payload = await _parse_body(request, Ebooktest)
+    _id = await create_document(_ebooktests, payload)
     return {"id": _id}
 
 
 # --------- Optional seed route for demo ---------
 
 @app.post("/api/seed")
-def seed_demo():
+async def seed_demo():
     """Insert a few demo documents if collections are empty (Hungarian)"""
     out = {"inserted": {}}
+    # Collection metadata counts are enough to tell "empty"; fetch them together
+    blog_count, tip_count, challenge_count, ebook_count = await asyncio.gather(
+        _blogposts.estimated_document_count(),
+        _tips.estimated_document_count(),
+        _challenges.estimated_document_count(),
+        _ebooktests.estimated_document_count(),
+    )
+    inserts = []
+
     # Blogposts
-    if db[collection_name(Blogpost)].count_documents({}) == 0:
+    if blog_count == 0:
         posts = [
             Blogpost(
                 title="Digitális szombat: gyengéd kezdet",
@@ -191,32 +394,29 @@ def seed_demo():
                 author="Vendég",
             ),
         ]
-        for p in posts:
-            create_document(collection_name(Blogpost), p)
+        inserts.append(create_documents(_blogposts, posts))
         out["inserted"]["blogposts"] = len(posts)
 
     # Tips
-    if db[collection_name(Tip)].count_documents({}) == 0:
+    if tip_count == 0:
         tips = [
             Tip(title="Kapcsold ki az értesítéseket egy órára", description="A telefon megvár – a pillanat nem.", tags=["digitális detox"]),
             Tip(title="Sétálj fülhallgató nélkül", description="Hagyd, hogy a világ komponáljon.", tags=["tudatosság"]),
         ]
-        for t in tips:
-            create_document(collection_name(Tip), t)
+        inserts.append(create_documents(_tips, tips))
         out["inserted"]["tips"] = len(tips)
 
     # Challenges
-    if db[collection_name(Challenge)].count_documents({}) == 0:
+    if challenge_count == 0:
         challenges = [
             Challenge(title="24 óra közösségi hálók nélkül", description="Őrizd meg a kíváncsiságot görgetés nélkül", duration_days=1, tags=["digitális detox"]),
             Challenge(title="7 nap lassú kíváncsiság", description="Minden nap egy apró rituálé", duration_days=7),
         ]
-        for c in challenges:
-            create_document(collection_name(Challenge), c)
+        inserts.append(create_documents(_challenges, challenges))
         out["inserted"]["challenges"] = len(challenges)
 
     # Ebook tests
-    if db[collection_name(Ebooktest)].count_documents({}) == 0:
+    if ebook_count == 0:
         tests = [
             Ebooktest(
                 title="Melyik könyv segít lelassulni?",
@@ -226,14 +426,18 @@ def seed_demo():
                 tags=["ajánló"],
             )
         ]
-        for e in tests:
-            create_document(collection_name(Ebooktest), e)
+        inserts.append(create_documents(_ebooktests, tests))
         out["inserted"]["ebooktests"] = len(tests)
 
+    await asyncio.gather(*inserts)
+    if "blogposts" in out["inserted"]:
+        _invalidate_blogpost_lists()
     return out
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+    # Multiple workers require the import-string form of the app
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="uvloop", http="httptools")
@@ -1,49 +1,50 @@
 """
 Database Schemas for Digital Sabbath
 
-Each Pydantic model represents a MongoDB collection. The collection name
+Each msgspec Struct represents a MongoDB collection. The collection name
 is the lowercase of the class name.
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, List
+import msgspec
+from msgspec import Meta
+from typing import Annotated, Optional
 from datetime import datetime
 
 
-class Blogpost(BaseModel):
-    title: str = Field(..., description="Cím / כותרת")
-    slug: str = Field(..., description="URL-barát azonosító")
-    excerpt: Optional[str] = Field(None, description="Rövid leírás")
-    content: str = Field(..., description="Tartalom (Markdown vagy HTML)")
-    cover_image: Optional[str] = Field(None, description="Borítókép URL")
-    tags: List[str] = Field(default_factory=list, description="Címkék")
-    author: Optional[str] = Field(None, description="Szerző")
-    published_at: Optional[datetime] = Field(None, description="Közzététel dátuma")
-    lang: str = Field("hu", description="Nyelv (alapértelmezett: magyar)")
+class Blogpost(msgspec.Struct, kw_only=True):
+    title: Annotated[str, Meta(description="Cím / כותרת")]
+    slug: Annotated[str, Meta(pattern=r"^[a-z0-9-]{1,80}(?!\n)$", description="URL-barát azonosító")]
+    excerpt: Annotated[Optional[str], Meta(description="Rövid leírás")] = None
+    content: Annotated[str, Meta(max_length=200_000, description="Tartalom (Markdown vagy HTML)")]
+    cover_image: Annotated[Optional[str], Meta(description="Borítókép URL")] = None
+    tags: Annotated[list[str], Meta(max_length=16, description="Címkék")] = msgspec.field(default_factory=list)
+    author: Annotated[Optional[str], Meta(description="Szerző")] = None
+    published_at: Annotated[Optional[datetime], Meta(description="Közzététel dátuma")] = None
+    lang: Annotated[str, Meta(description="Nyelv (alapértelmezett: magyar)")] = "hu"
 
 
-class Tip(BaseModel):
+class Tip(msgspec.Struct, kw_only=True):
     title: str
     description: str
     category: Optional[str] = None
-    difficulty: Optional[str] = Field(None, description="easy | medium | hard")
-    tags: List[str] = Field(default_factory=list)
-    lang: str = Field("hu")
+    difficulty: Annotated[Optional[str], Meta(description="easy | medium | hard")] = None
+    tags: list[str] = msgspec.field(default_factory=list)
+    lang: str = "hu"
 
 
-class Challenge(BaseModel):
+class Challenge(msgspec.Struct, kw_only=True):
     title: str
     description: str
-    duration_days: int = Field(7, ge=1, le=90)
-    focus: Optional[str] = Field(None, description="pl. tech detox, mindfulness")
-    tags: List[str] = Field(default_factory=list)
-    lang: str = Field("hu")
+    duration_days: Annotated[int, Meta(ge=1, le=90)] = 7
+    focus: Annotated[Optional[str], Meta(description="pl. tech detox, mindfulness")] = None
+    tags: list[str] = msgspec.field(default_factory=list)
+    lang: str = "hu"
 
 
-class Ebooktest(BaseModel):
+class Ebooktest(msgspec.Struct, kw_only=True):
     title: str
     description: Optional[str] = None
-    questions: List[str] = Field(default_factory=list)
-    recommended_reads: List[str] = Field(default_factory=list, description="Kapcsolódó ebookok címei")
-    tags: List[str] = Field(default_factory=list)
-    lang: str = Field("hu")
+    questions: list[str] = msgspec.field(default_factory=list)
+    recommended_reads: Annotated[list[str], Meta(description="Kapcsolódó ebookok címei")] = msgspec.field(default_factory=list)
+    tags: list[str] = msgspec.field(default_factory=list)
+    lang: str = "hu"
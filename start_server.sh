@@ -15,5 +15,10 @@ mkdir -p logs
 echo "Installing dependencies..."
 pip install -r requirements.txt
 echo "Starting FastAPI server..."
-nohup uvicorn main:app --host 0.0.0.0 --port 8000 --reload > logs/server.log 2>&1 
+if [ "${RELOAD:-0}" = "1" ]; then
+  # Development: single auto-reloading worker
+  nohup uvicorn main:app --host 0.0.0.0 --port "${PORT:-8000}" --reload > logs/server.log 2>&1 
+else
+  nohup uvicorn main:app --host 0.0.0.0 --port "${PORT:-8000}" --workers "${WEB_CONCURRENCY:-$(nproc)}" --loop uvloop --http httptools > logs/server.log 2>&1 
+fi
 echo "Server started in background"
@@ -0,0 +1,58 @@
+"""
+Request validation tests for the POST endpoints.
+
+Invalid bodies are rejected before any database call, so these run without
+DATABASE_URL. Requires pytest and httpx<0.28 (Starlette 0.27's TestClient).
+"""
+
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+
+import main
+from schemas import Blogpost, Challenge
+
+client = TestClient(main.app)
+
+
+def _post(path, body: bytes):
+    return client.post(path, content=body, headers={"content-type": "application/json"})
+
+
+def test_blogpost_slug_with_trailing_newline_is_rejected():
+    response = _post("/api/blogposts", b'{"title": "t", "slug": "abc\\n", "content": "x"}')
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "slug"]
+
+
+def test_lax_decoding_accepts_numeric_strings_and_timestamps():
+    challenge = main._DECODERS[Challenge].decode(b'{"title": "t", "description": "d", "duration_days": "7"}')
+    assert challenge.duration_days == 7
+    post = main._DECODERS[Blogpost].decode(b'{"title": "t", "slug": "a", "content": "x", "published_at": 1700000000}')
+    assert post.published_at == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+
+
+# The error mapping parses msgspec's message wording; these pin it.
+
+def test_missing_field_is_reported_on_its_own_loc():
+    detail = _post("/api/tips", b'{"description": "d"}').json()["detail"]
+    assert detail == [{"loc": ["body", "title"], "msg": "Object missing required field `title`", "type": "missing"}]
+
+
+def test_invalid_list_item_is_reported_with_its_index():
+    detail = _post("/api/tips", b'{"title": "t", "description": "d", "tags": ["a", []]}').json()["detail"]
+    assert detail == [{"loc": ["body", "tags", 1], "msg": "Expected `str`, got `array`", "type": "value_error"}]
+
+
+def test_constraint_violation_is_reported_on_the_field():
+    response = _post("/api/challenges", b'{"title": "t", "description": "d", "duration_days": 0}')
+    assert response.status_code == 422
+    assert response.json()["detail"] == [{"loc": ["body", "duration_days"], "msg": "Expected `int` >= 1", "type": "value_error"}]
+
+
+def test_malformed_json_is_reported_as_json_invalid():
+    response = _post("/api/tips", b'{"title": ')
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "json_invalid"
+    assert error["loc"] == ["body"]